@@ -0,0 +1,20 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
+from bigquery_client import BigQueryClient  # noqa: E402
+
+# Rebuilds the dashboard rollup tables from the full raw history. The daily
+# job keeps them current afterwards; run this once after creating the tables.
+bq = BigQueryClient()
+
+query = f"SELECT MIN(snapshot_date) AS first, MAX(snapshot_date) AS last FROM `{bq.accounts_table}`"
+row = list(bq.client.query(query).result())[0]
+
+if row.first is None:
+    print("No account snapshots found, nothing to backfill.")
+else:
+    print(f"Backfilling rollups from {row.first} to {row.last}...")
+    bq.refresh_rollups(row.first.isoformat(), row.last.isoformat())
+    print("Done.")
@@ -0,0 +1,22 @@
+import argparse
+import logging
+import os
+import sys
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(SCRIPT_DIR, "src"))
+
+from history_exporter import DEFAULT_MAX_STREAMS, HistoryExporter  # noqa: E402
+
+# Exports accounts_raw, mandatory_spending and runway_info to local Parquet,
+# partitioned by snapshot_date. Rerunning only fetches dates not yet exported.
+logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+
+parser = argparse.ArgumentParser(description="Export warehouse history to Parquet.")
+parser.add_argument("--output-dir", default=os.path.join(SCRIPT_DIR, "exports"))
+parser.add_argument("--max-streams", type=int, default=DEFAULT_MAX_STREAMS)
+args = parser.parse_args()
+
+exporter = HistoryExporter(args.output_dir, max_streams=args.max_streams)
+for table_name, count in exporter.export_all().items():
+    print(f"{table_name}: {count} rows exported")
@@ -1,10 +1,13 @@
 import json
 import logging
 import os
-from datetime import datetime
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
 from google.cloud import bigquery
 from google.api_core import exceptions
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+from storage_writer import BigQueryStorageWriter
 
 logger = logging.getLogger(__name__)
 
@@ -12,22 +15,232 @@ logger = logging.getLogger(__name__)
 DEFAULT_ACCOUNTS_TABLE = "finance-dashboard-481505.financial_data.accounts_raw"
 DEFAULT_SPENDING_TABLE = "finance-dashboard-481505.financial_data.mandatory_spending"
 DEFAULT_RUNWAY_TABLE = "finance-dashboard-481505.financial_data.runway_info"
+DEFAULT_NET_WORTH_DAILY_TABLE = (
+    "finance-dashboard-481505.financial_data.net_worth_by_type_daily"
+)
+DEFAULT_RUNWAY_TREND_TABLE = (
+    "finance-dashboard-481505.financial_data.runway_trend_daily"
+)
+DEFAULT_INTRADAY_ACCOUNTS_TABLE = (
+    "finance-dashboard-481505.financial_data.accounts_intraday"
+)
+DEFAULT_PAGINATION_STATE_TABLE = (
+    "finance-dashboard-481505.financial_data.pagination_state"
+)
+
+# Column order and types for rows appended via the Storage Write API
+INTRADAY_ACCOUNTS_SCHEMA = [
+    ("title", "STRING"),
+    ("balance", "FLOAT"),
+    ("type", "STRING"),
+    ("snapshot_date", "DATE"),
+    ("snapshot_ts", "TIMESTAMP"),
+]
+
+# Overall deadline for a batch of jobs, and poll backoff bounds (seconds)
+DEFAULT_JOB_TIMEOUT = 300.0
+POLL_INTERVAL_INITIAL = 0.5
+POLL_INTERVAL_MAX = 5.0
+# How long to wait for a job to settle after cancelling it at the deadline
+CANCEL_GRACE_SECONDS = 30.0
+
+
+class BigQueryJobError(Exception):
+    """Raised when one or more jobs in a batch fail or miss the deadline."""
+
+    def __init__(self, errors: Dict[str, Exception]):
+        self.errors = errors
+        details = "; ".join(f"{label}: {err}" for label, err in errors.items())
+        super().__init__(f"{len(errors)} BigQuery job(s) failed: {details}")
+
+
+class JobStateUnknownError(TimeoutError):
+    """Raised for a job still running after its deadline and cancel request."""
+
+
+@dataclass
+class JobHandle:
+    """A submitted BigQuery job awaiting completion."""
+
+    label: str
+    table_id: str
+    job: Any
+    ignore_not_found: bool = False
 
 
 class BigQueryClient:
-    def __init__(self):
+    def __init__(self, storage_writer: Optional[Any] = None):
         self.client = bigquery.Client()
+        self._storage_writer = storage_writer
 
         # Load table IDs from environment variables with defaults
         self.accounts_table = os.getenv("BQ_ACCOUNTS_TABLE", DEFAULT_ACCOUNTS_TABLE)
         self.spending_table = os.getenv("BQ_SPENDING_TABLE", DEFAULT_SPENDING_TABLE)
         self.runway_table = os.getenv("BQ_RUNWAY_TABLE", DEFAULT_RUNWAY_TABLE)
+        self.net_worth_daily_table = os.getenv(
+            "BQ_NET_WORTH_DAILY_TABLE", DEFAULT_NET_WORTH_DAILY_TABLE
+        )
+        self.runway_trend_table = os.getenv(
+            "BQ_RUNWAY_TREND_TABLE", DEFAULT_RUNWAY_TREND_TABLE
+        )
+        self.intraday_accounts_table = os.getenv(
+            "BQ_INTRADAY_ACCOUNTS_TABLE", DEFAULT_INTRADAY_ACCOUNTS_TABLE
+        )
+        self.pagination_state_table = os.getenv(
+            "BQ_PAGINATION_STATE_TABLE", DEFAULT_PAGINATION_STATE_TABLE
+        )
+        self.job_timeout = float(
+            os.getenv("BQ_JOB_TIMEOUT_SECONDS", DEFAULT_JOB_TIMEOUT)
+        )
+        self.cancel_grace = CANCEL_GRACE_SECONDS
 
-    def write_accounts(self, categorized_accounts: List[Dict[str, Any]]) -> None:
+    @property
+    def storage_writer(self):
+        # Created on first use so daily runs never open a Storage Write client
+        if self._storage_writer is None:
+            self._storage_writer = BigQueryStorageWriter()
+        return self._storage_writer
+
+    def load_pagination_state(self, key: str) -> Optional[Dict[str, Any]]:
+        """Returns the saved page size and concurrency for key, if any."""
+        query = f"""
+            SELECT per_page, concurrency
+            FROM `{self.pagination_state_table}`
+            WHERE state_key = @state_key
+            LIMIT 1
+        """
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[bigquery.ScalarQueryParameter("state_key", "STRING", key)]
+        )
+        rows = list(
+            self.client.query(query, job_config=job_config).result(
+                timeout=self.job_timeout
+            )
+        )
+        if not rows:
+            return None
+        return {"per_page": rows[0]["per_page"], "concurrency": rows[0]["concurrency"]}
+
+    def save_pagination_state(self, key: str, state: Dict[str, Any]) -> None:
+        """Upserts the page size and concurrency chosen for the next run."""
+        merge_query = f"""
+            MERGE `{self.pagination_state_table}` T
+            USING (
+                SELECT
+                    @state_key AS state_key,
+                    @per_page AS per_page,
+                    @concurrency AS concurrency
+            ) S
+            ON T.state_key = S.state_key
+            WHEN MATCHED THEN UPDATE SET
+                per_page = S.per_page,
+                concurrency = S.concurrency,
+                updated_at = CURRENT_TIMESTAMP()
+            WHEN NOT MATCHED THEN
+                INSERT (state_key, per_page, concurrency, updated_at)
+                VALUES (S.state_key, S.per_page, S.concurrency, CURRENT_TIMESTAMP())
+        """
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[
+                bigquery.ScalarQueryParameter("state_key", "STRING", key),
+                bigquery.ScalarQueryParameter("per_page", "INT64", state["per_page"]),
+                bigquery.ScalarQueryParameter(
+                    "concurrency", "INT64", state["concurrency"]
+                ),
+            ]
+        )
+        query_job = self.client.query(merge_query, job_config=job_config)
+        self._wait_for_jobs(
+            [
+                JobHandle(
+                    label=f"merge {self.pagination_state_table}",
+                    table_id=self.pagination_state_table,
+                    job=query_job,
+                )
+            ]
+        )
+
+    def write_intraday_balances(
+        self,
+        categorized_accounts: List[Dict[str, Any]],
+        snapshot_ts: Optional[datetime] = None,
+    ) -> None:
+        """
+        Appends a timestamped balance snapshot through the Storage Write API.
+        Unlike the daily write, nothing is deleted and no load job is used, so
+        hourly refreshes don't consume load-job quota.
+        """
         if not categorized_accounts:
             logger.warning("No accounts to write.")
             return
 
+        snapshot_ts = snapshot_ts or datetime.now(timezone.utc)
+        rows = [
+            dict(acc, snapshot_ts=snapshot_ts.isoformat())
+            for acc in self._deduplicate_accounts(categorized_accounts)
+        ]
+        self.storage_writer.append_rows(
+            self.intraday_accounts_table, INTRADAY_ACCOUNTS_SCHEMA, rows, pending=True
+        )
+
+    def write_snapshot(
+        self,
+        categorized_accounts: List[Dict[str, Any]],
+        mandatory_spending: Dict[str, Any],
+        runway_metrics: Optional[Dict[str, Any]],
+    ) -> None:
+        """
+        Writes all three tables with overlapping jobs: every DELETE is submitted
+        up front and awaited together, then every load job likewise. The daily
+        rollup tables are then refreshed for the snapshot date.
+        """
+        accounts_write = self._prepare_accounts(categorized_accounts)
+        writes = [
+            accounts_write,
+            self._prepare_spending(mandatory_spending),
+            self._prepare_runway(runway_metrics),
+        ]
+        self._write_tables([w for w in writes if w is not None])
+
+        if accounts_write:
+            self.refresh_rollups(accounts_write[1])
+
+    def refresh_rollups(self, start_date: str, end_date: Optional[str] = None) -> None:
+        """
+        MERGEs the raw rows for start_date..end_date (inclusive) into the
+        pre-aggregated dashboard tables. A single date is the daily incremental
+        path; a wider range backfills history.
+        """
+        end_date = end_date or start_date
+        self._wait_for_jobs(
+            [
+                self._merge_net_worth_daily(start_date, end_date),
+                self._merge_runway_trend(start_date, end_date),
+            ]
+        )
+
+    def write_accounts(self, categorized_accounts: List[Dict[str, Any]]) -> None:
+        write = self._prepare_accounts(categorized_accounts)
+        if write:
+            self._write_tables([write])
+
+    def write_spending(self, mandatory_spending: Dict[str, Any]) -> None:
+        write = self._prepare_spending(mandatory_spending)
+        if write:
+            self._write_tables([write])
+
+    def write_runway(self, runway_metrics: Optional[Dict[str, Any]]) -> None:
+        write = self._prepare_runway(runway_metrics)
+        if write:
+            self._write_tables([write])
+
+    def _prepare_accounts(
+        self, categorized_accounts: List[Dict[str, Any]]
+    ) -> Optional[Tuple[str, str, List[Dict[str, Any]]]]:
+        if not categorized_accounts:
+            logger.warning("No accounts to write.")
+            return None
+
         unique_accounts = self._deduplicate_accounts(categorized_accounts)
 
         # Deduplication: Use date from the data itself
@@ -38,17 +251,13 @@ class BigQueryClient:
                 f"Snapshot date missing in data, using current date: {snapshot_date}"
             )
 
-        self._delete_data_for_date(self.accounts_table, snapshot_date)
+        return self.accounts_table, snapshot_date, unique_accounts
 
-        # Use Load Job instead of Streaming Insert
-        job_config = bigquery.LoadJobConfig(
-            write_disposition="WRITE_APPEND",  # We already handled dedup via DELETE
-        )
-        self._load_data_to_bigquery(self.accounts_table, unique_accounts, job_config)
-
-    def write_spending(self, mandatory_spending: Dict[str, Any]) -> None:
+    def _prepare_spending(
+        self, mandatory_spending: Dict[str, Any]
+    ) -> Optional[Tuple[str, str, List[Dict[str, Any]]]]:
         if not mandatory_spending:
-            return
+            return None
 
         # Ensure manual_estimates is serialized if it exists
         if "manual_estimates" in mandatory_spending:
@@ -61,28 +270,74 @@ class BigQueryClient:
         if not snapshot_date:
             snapshot_date = datetime.now().strftime("%Y-%m-%d")
 
-        self._delete_data_for_date(self.spending_table, snapshot_date)
+        return self.spending_table, snapshot_date, [mandatory_spending]
 
-        # Use Load Job
-        job_config = bigquery.LoadJobConfig(write_disposition="WRITE_APPEND")
-        self._load_data_to_bigquery(
-            self.spending_table, [mandatory_spending], job_config
-        )
-
-    def write_runway(self, runway_metrics: Optional[Dict[str, Any]]) -> None:
+    def _prepare_runway(
+        self, runway_metrics: Optional[Dict[str, Any]]
+    ) -> Optional[Tuple[str, str, List[Dict[str, Any]]]]:
         if not runway_metrics:
-            return
+            return None
 
         # Deduplication: Use date from data
         snapshot_date = runway_metrics.get("snapshot_date")
         if not snapshot_date:
             snapshot_date = datetime.now().strftime("%Y-%m-%d")
 
-        self._delete_data_for_date(self.runway_table, snapshot_date)
+        return self.runway_table, snapshot_date, [runway_metrics]
+
+    def _write_tables(
+        self, writes: List[Tuple[str, str, List[Dict[str, Any]]]]
+    ) -> None:
+        # Phase 1: clear the day's rows in every table concurrently
+        errors: Dict[str, Exception] = {}
+        delete_jobs = []
+        for table_id, snapshot_date, _ in writes:
+            try:
+                job = self._delete_data_for_date(table_id, snapshot_date)
+            except Exception as e:
+                errors[f"delete {table_id}"] = e
+                continue
+            if job is not None:
+                delete_jobs.append(job)
+        errors.update(self._collect_job_errors(delete_jobs))
+
+        # Phase 2: Use Load Jobs instead of Streaming Insert. Every table whose
+        # DELETE went through is reloaded even if another table's failed, so no
+        # table is left without the day's rows.
+        failed_tables = {
+            table_id for table_id, _, _ in writes if f"delete {table_id}" in errors
+        }
+        for table_id in failed_tables:
+            if isinstance(errors[f"delete {table_id}"], JobStateUnknownError):
+                # The DELETE may still commit after we give up on it
+                logger.error(
+                    f"DELETE on {table_id} did not settle after cancellation; the "
+                    f"table may now be missing the day's rows and needs a rerun."
+                )
+        job_config = bigquery.LoadJobConfig(
+            write_disposition="WRITE_APPEND",  # We already handled dedup via DELETE
+        )
+        load_jobs = []
+        for table_id, _, rows in writes:
+            if table_id in failed_tables:
+                continue
+            try:
+                load_jobs.append(
+                    self._load_data_to_bigquery(table_id, rows, job_config)
+                )
+            except Exception as e:
+                errors[f"load {table_id}"] = e
+        errors.update(self._collect_job_errors(load_jobs))
 
-        # Use Load Job
-        job_config = bigquery.LoadJobConfig(write_disposition="WRITE_APPEND")
-        self._load_data_to_bigquery(self.runway_table, [runway_metrics], job_config)
+        if errors:
+            raise BigQueryJobError(errors)
+
+    def _collect_job_errors(self, handles: List[JobHandle]) -> Dict[str, Exception]:
+        try:
+            self._wait_for_jobs(handles)
+        except BigQueryJobError as e:
+            return e.errors
+        return {}
 
     def _deduplicate_accounts(
         self, accounts: List[Dict[str, Any]]
@@ -102,7 +357,9 @@ class BigQueryClient:
             )
         return unique_accounts
 
-    def _delete_data_for_date(self, table_id: str, snapshot_date: str) -> None:
+    def _delete_data_for_date(
+        self, table_id: str, snapshot_date: str
+    ) -> Optional[JobHandle]:
         delete_query = f"""
             DELETE FROM `{table_id}`
             WHERE snapshot_date = @snapshot_date
@@ -114,10 +371,16 @@ class BigQueryClient:
         )
         try:
             query_job = self.client.query(delete_query, job_config=job_config)
-            query_job.result()  # Wait for job to complete
-            logger.info(f"Cleared existing entries for {snapshot_date} in {table_id}.")
+            logger.info(f"Submitted delete of {snapshot_date} entries in {table_id}.")
+            return JobHandle(
+                label=f"delete {table_id}",
+                table_id=table_id,
+                job=query_job,
+                ignore_not_found=True,
+            )
         except exceptions.NotFound:
             logger.info(f"Table {table_id} not found, proceeding.")
+            return None
         except exceptions.GoogleAPICallError as e:
             logger.error(f"Failed to clear existing entries: {e}")
             raise e
@@ -130,16 +393,203 @@ class BigQueryClient:
         table_id: str,
         data: List[Dict[str, Any]],
         job_config: bigquery.LoadJobConfig,
-    ) -> None:
+    ) -> JobHandle:
         try:
             job = self.client.load_table_from_json(
                 data, table_id, job_config=job_config
             )
-            job.result()  # Wait for loading to complete
-            logger.info(f"Successfully loaded data into {table_id}.")
+            logger.info(f"Submitted load of {len(data)} rows into {table_id}.")
+            return JobHandle(label=f"load {table_id}", table_id=table_id, job=job)
         except exceptions.GoogleAPICallError as e:
             logger.error(f"Failed to load data: {e}")
             raise e
         except Exception as e:
             logger.error(f"Unexpected error loading data: {e}")
             raise e
+
+    def _merge_net_worth_daily(self, start_date: str, end_date: str) -> JobHandle:
+        merge_query = f"""
+            MERGE `{self.net_worth_daily_table}` T
+            USING (
+                SELECT
+                    snapshot_date,
+                    type,
+                    SUM(balance) AS total_balance,
+                    SUM(IF(balance > 0, balance, 0)) AS assets,
+                    SUM(IF(balance < 0, balance, 0)) AS liabilities,
+                    COUNT(*) AS account_count
+                FROM `{self.accounts_table}`
+                WHERE snapshot_date BETWEEN @start_date AND @end_date
+                GROUP BY snapshot_date, type
+            ) S
+            ON T.snapshot_date = S.snapshot_date AND T.type = S.type
+            WHEN MATCHED THEN UPDATE SET
+                total_balance = S.total_balance,
+                assets = S.assets,
+                liabilities = S.liabilities,
+                account_count = S.account_count
+            WHEN NOT MATCHED THEN
+                INSERT (snapshot_date, type, total_balance, assets, liabilities, account_count)
+                VALUES (S.snapshot_date, S.type, S.total_balance, S.assets, S.liabilities, S.account_count)
+            WHEN NOT MATCHED BY SOURCE
+                AND T.snapshot_date BETWEEN @start_date AND @end_date THEN DELETE
+        """
+        return self._submit_merge(
+            self.net_worth_daily_table, merge_query, start_date, end_date
+        )
+
+    def _merge_runway_trend(self, start_date: str, end_date: str) -> JobHandle:
+        # Moving averages span calendar days, so earlier rows are read back from
+        # the rollup itself rather than rescanning the raw tables.
+        merge_query = f"""
+            MERGE `{self.runway_trend_table}` T
+            USING (
+                WITH daily AS (
+                    SELECT
+                        snapshot_date,
+                        SUM(balance) AS net_worth,
+                        SUM(IF(type = 'Cash', balance, 0)) AS cash_on_hand
+                    FROM `{self.accounts_table}`
+                    WHERE snapshot_date BETWEEN @start_date AND @end_date
+                    GROUP BY snapshot_date
+                ),
+                fresh AS (
+                    SELECT
+                        d.snapshot_date,
+                        d.net_worth,
+                        d.cash_on_hand,
+                        r.annual_burn,
+                        r.runway_days
+                    FROM daily d
+                    LEFT JOIN `{self.runway_table}` r
+                        ON r.snapshot_date = d.snapshot_date
+                ),
+                history AS (
+                    SELECT snapshot_date, runway_days
+                    FROM `{self.runway_trend_table}`
+                    WHERE snapshot_date >= DATE_SUB(@start_date, INTERVAL 29 DAY)
+                        AND snapshot_date < @start_date
+                    UNION ALL
+                    SELECT snapshot_date, runway_days FROM fresh
+                ),
+                windowed AS (
+                    SELECT
+                        snapshot_date,
+                        AVG(runway_days) OVER (
+                            ORDER BY UNIX_DATE(snapshot_date)
+                            RANGE BETWEEN 6 PRECEDING AND CURRENT ROW
+                        ) AS runway_days_7d_avg,
+                        AVG(runway_days) OVER (
+                            ORDER BY UNIX_DATE(snapshot_date)
+                            RANGE BETWEEN 29 PRECEDING AND CURRENT ROW
+                        ) AS runway_days_30d_avg
+                    FROM history
+                )
+                SELECT f.*, w.runway_days_7d_avg, w.runway_days_30d_avg
+                FROM fresh f
+                JOIN windowed w USING (snapshot_date)
+            ) S
+            ON T.snapshot_date = S.snapshot_date
+            WHEN MATCHED THEN UPDATE SET
+                net_worth = S.net_worth,
+                cash_on_hand = S.cash_on_hand,
+                annual_burn = S.annual_burn,
+                runway_days = S.runway_days,
+                runway_days_7d_avg = S.runway_days_7d_avg,
+                runway_days_30d_avg = S.runway_days_30d_avg
+            WHEN NOT MATCHED THEN
+                INSERT (snapshot_date, net_worth, cash_on_hand, annual_burn, runway_days,
+                        runway_days_7d_avg, runway_days_30d_avg)
+                VALUES (S.snapshot_date, S.net_worth, S.cash_on_hand, S.annual_burn,
+                        S.runway_days, S.runway_days_7d_avg, S.runway_days_30d_avg)
+        """
+        return self._submit_merge(
+            self.runway_trend_table, merge_query, start_date, end_date
+        )
+
+    def _submit_merge(
+        self, table_id: str, merge_query: str, start_date: str, end_date: str
+    ) -> JobHandle:
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[
+                bigquery.ScalarQueryParameter("start_date", "DATE", start_date),
+                bigquery.ScalarQueryParameter("end_date", "DATE", end_date),
+            ]
+        )
+        try:
+            query_job = self.client.query(merge_query, job_config=job_config)
+            logger.info(f"Submitted rollup merge into {table_id}.")
+            return JobHandle(
+                label=f"merge {table_id}", table_id=table_id, job=query_job
+            )
+        except exceptions.GoogleAPICallError as e:
+            logger.error(f"Failed to refresh rollup {table_id}: {e}")
+            raise e
+
+    def _wait_for_jobs(self, handles: List[JobHandle]) -> None:
+        """
+        Polls all submitted jobs until each finishes or the shared deadline
+        passes. Jobs still running at the deadline are cancelled and given a
+        short grace period to reach a final state. Failures are collected per
+        job and raised together.
+        """
+        deadline = time.monotonic() + self.job_timeout
+        interval = POLL_INTERVAL_INITIAL
+        pending = list(handles)
+        cancelled = set()
+        errors: Dict[str, Exception] = {}
+
+        while pending:
+            still_pending = []
+            for handle in pending:
+                try:
+                    if not handle.job.done():
+                        still_pending.append(handle)
+                        continue
+                    handle.job.result()  # Raises the job's error, if any
+                    logger.info(f"Completed {handle.label}.")
+                except exceptions.NotFound as e:
+                    if handle.ignore_not_found:
+                        logger.info(f"Table {handle.table_id} not found, proceeding.")
+                    else:
+                        errors[handle.label] = e
+                except Exception as e:
+                    if handle.label in cancelled:
+                        errors[handle.label] = TimeoutError(
+                            f"Job {handle.job.job_id} exceeded {self.job_timeout}s "
+                            f"and was cancelled: {e}"
+                        )
+                    else:
+                        errors[handle.label] = e
+            pending = still_pending
+
+            if pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    if not cancelled:
+                        for handle in pending:
+                            self._cancel_job(handle)
+                            cancelled.add(handle.label)
+                        deadline = time.monotonic() + self.cancel_grace
+                        continue
+                    for handle in pending:
+                        errors[handle.label] = JobStateUnknownError(
+                            f"Job {handle.job.job_id} did not finish within "
+                            f"{self.job_timeout}s and had not settled after "
+                            f"cancellation."
+                        )
+                    break
+                time.sleep(min(interval, remaining))
+                interval = min(interval * 2, POLL_INTERVAL_MAX)
+
+        if errors:
+            for label, err in errors.items():
+                logger.error(f"BigQuery job failed ({label}): {err}")
+            raise BigQueryJobError(errors)
+
+    def _cancel_job(self, handle: JobHandle) -> None:
+        try:
+            handle.job.cancel()
+            logger.warning(f"Cancelled {handle.label} after {self.job_timeout}s.")
+        except Exception as e:
+            logger.error(f"Failed to cancel {handle.label}: {e}")
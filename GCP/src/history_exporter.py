@@ -0,0 +1,160 @@
+import logging
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from google.cloud import bigquery_storage_v1
+from google.cloud.bigquery_storage_v1 import types
+
+from bigquery_client import (
+    DEFAULT_ACCOUNTS_TABLE,
+    DEFAULT_SPENDING_TABLE,
+    DEFAULT_RUNWAY_TABLE,
+)
+
+logger = logging.getLogger(__name__)
+
+# Local dataset name -> (environment variable, default table ID)
+EXPORT_TABLES = {
+    "accounts_raw": ("BQ_ACCOUNTS_TABLE", DEFAULT_ACCOUNTS_TABLE),
+    "mandatory_spending": ("BQ_SPENDING_TABLE", DEFAULT_SPENDING_TABLE),
+    "runway_info": ("BQ_RUNWAY_TABLE", DEFAULT_RUNWAY_TABLE),
+}
+
+PARTITION_COLUMN = "snapshot_date"
+DEFAULT_MAX_STREAMS = 4
+
+
+class HistoryExporter:
+    """
+    Exports warehouse tables to hive-partitioned Parquet via the Storage Read API.
+
+    Each table is read as Arrow record batches over parallel read streams and
+    written under <output_dir>/<table>/snapshot_date=YYYY-MM-DD/. Later runs
+    only read from the newest exported date onward; that date is re-exported
+    because the daily job may have rewritten it since.
+    """
+
+    def __init__(
+        self,
+        output_dir: str,
+        max_streams: int = DEFAULT_MAX_STREAMS,
+        read_client: Optional[bigquery_storage_v1.BigQueryReadClient] = None,
+    ):
+        self.output_dir = output_dir
+        self.max_streams = max_streams
+        self.read_client = read_client or bigquery_storage_v1.BigQueryReadClient()
+
+    def export_all(self) -> Dict[str, int]:
+        counts = {}
+        for name, (env_var, default_table) in EXPORT_TABLES.items():
+            counts[name] = self.export_table(name, os.getenv(env_var, default_table))
+        return counts
+
+    def export_table(self, name: str, table_id: str) -> int:
+        table_dir = os.path.join(self.output_dir, name)
+        since = self._latest_exported_date(table_dir)
+        if since:
+            logger.info(f"Exporting {table_id} from {since} onward.")
+        else:
+            logger.info(f"Exporting full history of {table_id}.")
+
+        session = self._create_session(table_id, since)
+        if not session.streams:
+            logger.info(f"No new rows in {table_id}.")
+            return 0
+
+        # Streams write into a staging directory that is only moved into place
+        # once every stream has succeeded, so a failed run leaves the existing
+        # export untouched and the next run resumes from the same date.
+        run_id = datetime.now().strftime("%Y%m%d%H%M%S")
+        staging_dir = os.path.join(table_dir, f".staging-{run_id}")
+        try:
+            with ThreadPoolExecutor(max_workers=len(session.streams)) as pool:
+                counts = pool.map(
+                    lambda indexed: self._export_stream(
+                        session, indexed[0], indexed[1], staging_dir, run_id
+                    ),
+                    enumerate(session.streams),
+                )
+                total = sum(counts)
+            self._publish(staging_dir, table_dir, since)
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+        logger.info(f"Exported {total} rows from {table_id} to {table_dir}.")
+        return total
+
+    def _publish(self, staging_dir: str, table_dir: str, since: Optional[str]) -> None:
+        if since:
+            # The newest date was re-read in full, so drop the stale copy
+            shutil.rmtree(self._partition_dir(table_dir, since), ignore_errors=True)
+        if not os.path.isdir(staging_dir):
+            return
+        for partition in os.listdir(staging_dir):
+            target = os.path.join(table_dir, partition)
+            shutil.rmtree(target, ignore_errors=True)
+            os.replace(os.path.join(staging_dir, partition), target)
+
+    def _create_session(self, table_id: str, since: Optional[str]) -> types.ReadSession:
+        project, dataset, table = table_id.split(".")
+        read_options = types.ReadSession.TableReadOptions()
+        if since:
+            read_options.row_restriction = f"{PARTITION_COLUMN} >= DATE '{since}'"
+
+        return self.read_client.create_read_session(
+            parent=f"projects/{project}",
+            read_session=types.ReadSession(
+                table=f"projects/{project}/datasets/{dataset}/tables/{table}",
+                data_format=types.DataFormat.ARROW,
+                read_options=read_options,
+            ),
+            max_stream_count=self.max_streams,
+        )
+
+    def _export_stream(
+        self,
+        session: types.ReadSession,
+        index: int,
+        stream: types.ReadStream,
+        output_dir: str,
+        run_id: str,
+    ) -> int:
+        reader = self.read_client.read_rows(stream.name)
+        batches = [page.to_arrow() for page in reader.rows(session).pages]
+        batches = [batch for batch in batches if batch.num_rows]
+        if not batches:
+            return 0
+
+        pq.write_to_dataset(
+            pa.Table.from_batches(batches),
+            root_path=output_dir,
+            partition_cols=[PARTITION_COLUMN],
+            basename_template=f"part-{run_id}-{index}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+        )
+        return sum(batch.num_rows for batch in batches)
+
+    def _latest_exported_date(self, table_dir: str) -> Optional[str]:
+        if not os.path.isdir(table_dir):
+            return None
+
+        prefix = f"{PARTITION_COLUMN}="
+        dates = []
+        for entry in os.listdir(table_dir):
+            if not entry.startswith(prefix):
+                continue
+            value = entry[len(prefix) :]
+            try:
+                datetime.strptime(value, "%Y-%m-%d")
+            except ValueError:
+                continue  # e.g. the partition for NULL dates
+            dates.append(value)
+        return max(dates) if dates else None
+
+    def _partition_dir(self, table_dir: str, snapshot_date: str) -> str:
+        return os.path.join(table_dir, f"{PARTITION_COLUMN}={snapshot_date}")
@@ -3,8 +3,10 @@ import logging
 import requests
 from google.api_core import exceptions
 from pocketsmith_client import PocketSmithClient
+from pagination_controller import PaginationController
 from processor import DataProcessor
-from bigquery_client import BigQueryClient
+from bigquery_client import BigQueryClient, BigQueryJobError
+from storage_writer import StorageWriteError
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
@@ -12,7 +14,12 @@ logger = logging.getLogger(__name__)
 
 
 def main():
-    logger.info("--- Starting Daily Data Refresh (Cloud Run Job) ---")
+    # "intraday" appends balances only; anything else runs the full daily refresh
+    refresh_mode = os.getenv("REFRESH_MODE", "daily").lower()
+    if refresh_mode == "intraday":
+        logger.info("--- Starting Intraday Balance Refresh (Cloud Run Job) ---")
+    else:
+        logger.info("--- Starting Daily Data Refresh (Cloud Run Job) ---")
 
     # Load configuration from environment variables
     # (Secrets are injected by Cloud Run via Secret Manager - see terraform/cloud_run.tf)
@@ -24,8 +31,11 @@ def main():
         logger.error("Missing required environment variables.")
         return
 
-    powerquery_client = PocketSmithClient(api_key, user_id)
     bq_client = BigQueryClient()
+    # Tuned page size and concurrency are kept in BigQuery between executions
+    powerquery_client = PocketSmithClient(
+        api_key, user_id, PaginationController(state_store=bq_client)
+    )
     processor = DataProcessor(config_json)
 
     try:
@@ -34,6 +44,12 @@ def main():
         accounts = powerquery_client.get_accounts()
         categorized_accounts = processor.categorize_accounts(accounts)
 
+        if refresh_mode == "intraday":
+            logger.info("Appending intraday balance snapshot to BigQuery...")
+            bq_client.write_intraday_balances(categorized_accounts)
+            logger.info("--- Intraday Refresh Complete ---")
+            return
+
         # 3. Fetch Transactions (Mandatory Spending)
         logger.info("Fetching transactions for mandatory spending...")
         transactions = powerquery_client.get_transactions_past_year()
@@ -47,9 +63,9 @@ def main():
 
         # 5. Push to BigQuery
         logger.info("Pushing results to BigQuery...")
-        bq_client.write_accounts(categorized_accounts)
-        bq_client.write_spending(mandatory_spending)
-        bq_client.write_runway(runway_metrics)
+        bq_client.write_snapshot(
+            categorized_accounts, mandatory_spending, runway_metrics
+        )
 
         logger.info("--- Refresh Complete ---")
 
@@ -57,6 +73,10 @@ def main():
         logger.error(f"PocketSmith API Error: {e}")
     except exceptions.GoogleAPICallError as e:
         logger.error(f"BigQuery API Error: {e}")
+    except BigQueryJobError as e:
+        logger.error(f"BigQuery Job Error: {e}")
+    except StorageWriteError as e:
+        logger.error(f"BigQuery Storage Write Error: {e}")
     except Exception as e:
         logger.exception(f"An error occurred during the data refresh: {e}")
 
@@ -0,0 +1,213 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Any, Optional, Mapping
+
+logger = logging.getLogger(__name__)
+
+# PocketSmith accepts per_page between 10 and 1000
+MIN_PER_PAGE = 10
+MAX_PER_PAGE = 1000
+MAX_CONCURRENCY = 4
+
+# Tuning targets: a page should come back quickly and stay reasonably small
+TARGET_LATENCY_SECONDS = 2.0
+TARGET_PAYLOAD_BYTES = 2 * 1024 * 1024
+
+# Stop issuing requests once the remaining quota drops to this many calls
+RATE_LIMIT_RESERVE = 5
+MAX_THROTTLE_SECONDS = 60.0
+DEFAULT_RETRY_AFTER_SECONDS = 5.0
+# X-RateLimit-Reset values above this are epoch timestamps (2001 onward)
+EPOCH_THRESHOLD = 1e9
+
+# Identifies this endpoint's settings in the state store
+STATE_KEY = "pocketsmith_transactions"
+
+
+class PaginationController:
+    """
+    Chooses page size and request concurrency for paginated PocketSmith calls.
+
+    Concurrency adapts within a run from observed latency and rate-limit
+    headers. Page size cannot change mid-run without breaking page offsets, so
+    it is tuned from the run's observations and saved to the state store for
+    the next run.
+    """
+
+    def __init__(self, state_store: Optional[Any] = None):
+        # The store must provide load_pagination_state(key) and
+        # save_pagination_state(key, state); BigQueryClient is used in production
+        if state_store is None and os.getenv("POCKETSMITH_PAGINATION_STATE"):
+            state_store = FileStateStore(os.getenv("POCKETSMITH_PAGINATION_STATE"))
+        self.state_store = state_store
+        self.per_page = MAX_PER_PAGE
+        self.concurrency = 1
+        self._lock = threading.Lock()
+        self._latencies = []
+        self._bytes_per_row = []
+        self._rate_limited = False
+        self._loaded = False
+
+    def load(self) -> None:
+        """Starts from the configuration saved by the previous run, if any."""
+        if self._loaded or not self.state_store:
+            return
+        self._loaded = True
+        try:
+            state = self.state_store.load_pagination_state(STATE_KEY)
+        except Exception as e:
+            logger.warning(f"Failed to load pagination state: {e}")
+            return
+        if not state:
+            return
+        try:
+            self.per_page = _clamp_per_page(state.get("per_page", self.per_page))
+            self.concurrency = max(
+                1, min(int(state.get("concurrency", self.concurrency)), MAX_CONCURRENCY)
+            )
+        except (ValueError, TypeError, AttributeError) as e:
+            logger.warning(f"Ignoring unreadable pagination state: {e}")
+            return
+        logger.info(
+            f"Loaded pagination state: per_page={self.per_page}, "
+            f"concurrency={self.concurrency}."
+        )
+
+    def observe(
+        self,
+        latency: float,
+        payload_bytes: int,
+        row_count: int,
+        headers: Mapping[str, str],
+    ) -> None:
+        """Records one successful page and throttles if quota is running low."""
+        with self._lock:
+            self._latencies.append(latency)
+            if row_count:
+                self._bytes_per_row.append(payload_bytes / row_count)
+
+            if latency > TARGET_LATENCY_SECONDS * 1.5 and self.concurrency > 1:
+                self.concurrency -= 1
+                logger.info(
+                    f"Page took {latency:.2f}s, reducing concurrency to {self.concurrency}."
+                )
+            elif latency < TARGET_LATENCY_SECONDS and self._has_headroom(headers):
+                self.concurrency = min(self.concurrency + 1, MAX_CONCURRENCY)
+
+        delay = self._throttle_delay(headers)
+        if delay:
+            logger.info(f"Rate limit nearly exhausted, pausing for {delay:.1f}s.")
+            time.sleep(delay)
+
+    def on_rate_limited(self, headers: Mapping[str, str]) -> None:
+        """Backs off after a 429 response before the page is retried."""
+        with self._lock:
+            self._rate_limited = True
+            self.concurrency = 1
+
+        retry_after = _parse_float(headers.get("Retry-After"))
+        delay = min(
+            retry_after if retry_after is not None else DEFAULT_RETRY_AFTER_SECONDS,
+            MAX_THROTTLE_SECONDS,
+        )
+        logger.warning(f"Rate limited by PocketSmith, retrying in {delay:.1f}s.")
+        time.sleep(delay)
+
+    def finish(self) -> None:
+        """Derives the next run's starting configuration and persists it."""
+        with self._lock:
+            if self._latencies:
+                avg_latency = sum(self._latencies) / len(self._latencies)
+                per_page = self.per_page
+                if avg_latency > TARGET_LATENCY_SECONDS:
+                    per_page = per_page * TARGET_LATENCY_SECONDS / avg_latency
+                elif avg_latency < TARGET_LATENCY_SECONDS / 2:
+                    per_page = per_page * 1.5
+
+                if self._bytes_per_row:
+                    avg_row_bytes = sum(self._bytes_per_row) / len(self._bytes_per_row)
+                    per_page = min(per_page, TARGET_PAYLOAD_BYTES / avg_row_bytes)
+
+                self.per_page = _clamp_per_page(per_page)
+
+            if self._rate_limited:
+                self.concurrency = 1
+
+        logger.info(
+            f"Next run will use per_page={self.per_page}, concurrency={self.concurrency}."
+        )
+        self._save_state()
+
+    def _has_headroom(self, headers: Mapping[str, str]) -> bool:
+        remaining = _parse_float(headers.get("X-RateLimit-Remaining"))
+        if remaining is None:
+            return True
+        return remaining > RATE_LIMIT_RESERVE + 2 * MAX_CONCURRENCY
+
+    def _throttle_delay(self, headers: Mapping[str, str]) -> float:
+        remaining = _parse_float(headers.get("X-RateLimit-Remaining"))
+        if remaining is None or remaining > RATE_LIMIT_RESERVE:
+            return 0.0
+
+        with self._lock:
+            self.concurrency = 1
+
+        # X-RateLimit-Reset may be an epoch timestamp or a number of seconds;
+        # an epoch time already in the past means the quota has reset
+        reset = _parse_float(headers.get("X-RateLimit-Reset"))
+        if reset is None:
+            return DEFAULT_RETRY_AFTER_SECONDS
+        if reset > EPOCH_THRESHOLD:
+            reset -= time.time()
+        return max(0.0, min(reset, MAX_THROTTLE_SECONDS))
+
+    def _save_state(self) -> None:
+        if not self.state_store:
+            return
+        state: Dict[str, Any] = {
+            "per_page": self.per_page,
+            "concurrency": self.concurrency,
+        }
+        try:
+            self.state_store.save_pagination_state(STATE_KEY, state)
+        except Exception as e:
+            logger.warning(f"Failed to save pagination state: {e}")
+
+
+class FileStateStore:
+    """Keeps pagination state in a local JSON file, for runs outside Cloud Run."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load_pagination_state(self, key: str) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path) as f:
+            return json.load(f).get(key)
+
+    def save_pagination_state(self, key: str, state: Dict[str, Any]) -> None:
+        states = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path) as f:
+                    states = json.load(f)
+            except ValueError:
+                pass  # Overwrite an unreadable file
+        states[key] = state
+        with open(self.path, "w") as f:
+            json.dump(states, f)
+
+
+def _clamp_per_page(per_page: float) -> int:
+    return int(max(MIN_PER_PAGE, min(round(per_page), MAX_PER_PAGE)))
+
+
+def _parse_float(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
@@ -1,17 +1,31 @@
 import requests
 import logging
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+from pagination_controller import PaginationController, MAX_CONCURRENCY
+
+# Retries for a single page after a 429 before giving up
+MAX_RATE_LIMIT_RETRIES = 3
 
 logger = logging.getLogger(__name__)
 
 
 class PocketSmithClient:
-    def __init__(self, api_key: str, user_id: str):
+    def __init__(
+        self,
+        api_key: str,
+        user_id: str,
+        pagination: Optional[PaginationController] = None,
+    ):
         self.api_key = api_key
         self.user_id = user_id
         self.base_url = f"https://api.pocketsmith.com/v2/users/{user_id}"
         self.headers = {"Accept": "application/json", "X-Developer-Key": api_key}
+        self.pagination = pagination or PaginationController()
 
     def get_accounts(self) -> List[Dict[str, Any]]:
         url = f"{self.base_url}/accounts"
@@ -25,24 +39,64 @@ class PocketSmithClient:
         start_date = end_date - timedelta(days=365)
 
         url = f"{self.base_url}/transactions"
+        self.pagination.load()
         params = {
             "start_date": start_date.strftime("%Y-%m-%d"),
             "end_date": end_date.strftime("%Y-%m-%d"),
             "uncategorised": 0,
             "type": "debit",
-            "per_page": 1000,
+            "per_page": self.pagination.per_page,
         }
 
+        # Pages are fetched one at a time until the response headers reveal the
+        # page count; after that, batches run at the controller's concurrency.
         all_transactions = []
         page = 1
-        while True:
-            params["page"] = page
+        last_page = None
+        with ThreadPoolExecutor(max_workers=MAX_CONCURRENCY) as pool:
+            while last_page is None or page <= last_page:
+                width = 1
+                if last_page is not None:
+                    width = min(self.pagination.concurrency, last_page - page + 1)
+                pages = range(page, page + width)
+                results = list(
+                    pool.map(
+                        lambda p: self._fetch_transactions_page(url, params, p), pages
+                    )
+                )
+
+                reached_end = False
+                for data, page_count in results:
+                    if page_count:
+                        last_page = page_count
+                    if not data:
+                        reached_end = True
+                        break
+                    all_transactions.extend(data)
+                if reached_end:
+                    break
+                page += width
+
+        self.pagination.finish()
+        return all_transactions
+
+    def _fetch_transactions_page(
+        self, url: str, params: Dict[str, Any], page: int
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        page_params = dict(params, page=page)
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
             logger.info(f"Fetching transactions page {page}...")
-            response = requests.get(url, headers=self.headers, params=params)
+            start = time.monotonic()
+            response = requests.get(url, headers=self.headers, params=page_params)
+            latency = time.monotonic() - start
+
+            if response.status_code == 429 and attempt < MAX_RATE_LIMIT_RETRIES:
+                self.pagination.on_rate_limited(response.headers)
+                continue
 
             if response.status_code == 400 and "out of bounds" in response.text:
                 logger.info("Reached end of transactions (out of bounds).")
-                break
+                return [], None
 
             if response.status_code != 200:
                 logger.error(
@@ -51,9 +105,19 @@ class PocketSmithClient:
                 response.raise_for_status()
 
             data = response.json()
-            if not data:
-                break
-            all_transactions.extend(data)
-            page += 1
+            self.pagination.observe(
+                latency, len(response.content), len(data), response.headers
+            )
+            return data, self._last_page(response, params["per_page"])
 
-        return all_transactions
+    def _last_page(self, response: requests.Response, per_page: int) -> Optional[int]:
+        last_link = response.links.get("last")
+        if last_link:
+            last = parse_qs(urlparse(last_link["url"]).query).get("page")
+            if last and last[0].isdigit():
+                return int(last[0])
+
+        total = response.headers.get("Total")
+        if total and total.isdigit():
+            return max(1, math.ceil(int(total) / per_page))
+        return None
@@ -49,3 +49,77 @@ resource "google_bigquery_table" "runway_info" {
 ]
 EOF
 }
+
+# Pre-aggregated dashboard rollups, maintained by MERGE after each refresh
+resource "google_bigquery_table" "net_worth_by_type_daily" {
+  dataset_id = google_bigquery_dataset.financial_data.dataset_id
+  table_id   = "net_worth_by_type_daily"
+  deletion_protection = false
+
+  schema = <<EOF
+[
+  {"name": "snapshot_date", "type": "DATE", "mode": "REQUIRED"},
+  {"name": "type", "type": "STRING", "mode": "NULLABLE"},
+  {"name": "total_balance", "type": "FLOAT", "mode": "NULLABLE"},
+  {"name": "assets", "type": "FLOAT", "mode": "NULLABLE"},
+  {"name": "liabilities", "type": "FLOAT", "mode": "NULLABLE"},
+  {"name": "account_count", "type": "INTEGER", "mode": "NULLABLE"}
+]
+EOF
+}
+
+resource "google_bigquery_table" "runway_trend_daily" {
+  dataset_id = google_bigquery_dataset.financial_data.dataset_id
+  table_id   = "runway_trend_daily"
+  deletion_protection = false
+
+  schema = <<EOF
+[
+  {"name": "snapshot_date", "type": "DATE", "mode": "REQUIRED"},
+  {"name": "net_worth", "type": "FLOAT", "mode": "NULLABLE"},
+  {"name": "cash_on_hand", "type": "FLOAT", "mode": "NULLABLE"},
+  {"name": "annual_burn", "type": "FLOAT", "mode": "NULLABLE"},
+  {"name": "runway_days", "type": "INTEGER", "mode": "NULLABLE"},
+  {"name": "runway_days_7d_avg", "type": "FLOAT", "mode": "NULLABLE"},
+  {"name": "runway_days_30d_avg", "type": "FLOAT", "mode": "NULLABLE"}
+]
+EOF
+}
+
+# Hourly balance snapshots appended via the Storage Write API
+resource "google_bigquery_table" "accounts_intraday" {
+  dataset_id = google_bigquery_dataset.financial_data.dataset_id
+  table_id   = "accounts_intraday"
+  deletion_protection = false
+
+  time_partitioning {
+    type  = "DAY"
+    field = "snapshot_ts"
+  }
+
+  schema = <<EOF
+[
+  {"name": "title", "type": "STRING", "mode": "NULLABLE"},
+  {"name": "balance", "type": "FLOAT", "mode": "NULLABLE"},
+  {"name": "type", "type": "STRING", "mode": "NULLABLE"},
+  {"name": "snapshot_date", "type": "DATE", "mode": "NULLABLE"},
+  {"name": "snapshot_ts", "type": "TIMESTAMP", "mode": "NULLABLE"}
+]
+EOF
+}
+
+# Page size and concurrency tuned by the previous run of each PocketSmith fetch
+resource "google_bigquery_table" "pagination_state" {
+  dataset_id = google_bigquery_dataset.financial_data.dataset_id
+  table_id   = "pagination_state"
+  deletion_protection = false
+
+  schema = <<EOF
+[
+  {"name": "state_key", "type": "STRING", "mode": "REQUIRED"},
+  {"name": "per_page", "type": "INTEGER", "mode": "NULLABLE"},
+  {"name": "concurrency", "type": "INTEGER", "mode": "NULLABLE"},
+  {"name": "updated_at", "type": "TIMESTAMP", "mode": "NULLABLE"}
+]
+EOF
+}
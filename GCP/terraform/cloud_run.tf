@@ -53,6 +53,26 @@ resource "google_cloud_run_v2_job" "financial_refresh" {
           name  = "BQ_RUNWAY_TABLE"
           value = "${var.project_id}.financial_data.runway_info"
         }
+
+        env {
+          name  = "BQ_NET_WORTH_DAILY_TABLE"
+          value = "${var.project_id}.financial_data.net_worth_by_type_daily"
+        }
+
+        env {
+          name  = "BQ_RUNWAY_TREND_TABLE"
+          value = "${var.project_id}.financial_data.runway_trend_daily"
+        }
+
+        env {
+          name  = "BQ_INTRADAY_ACCOUNTS_TABLE"
+          value = "${var.project_id}.financial_data.accounts_intraday"
+        }
+
+        env {
+          name  = "BQ_PAGINATION_STATE_TABLE"
+          value = "${var.project_id}.financial_data.pagination_state"
+        }
       }
     }
   }
@@ -81,6 +101,35 @@ resource "google_cloud_scheduler_job" "refresh_timer" {
   }
 }
 
+# Hourly balance-only refresh: same job, switched to intraday mode via an
+# environment override so it appends through the Storage Write API
+resource "google_cloud_scheduler_job" "intraday_refresh_timer" {
+  name             = "financial-intraday-refresh-scheduler"
+  description      = "Trigger intraday balance refresh every hour"
+  schedule         = "40 * * * *"
+  time_zone        = "Etc/UTC"
+  attempt_deadline = "320s"
+
+  http_target {
+    http_method = "POST"
+    uri         = "https://${var.region}-run.googleapis.com/apis/run.googleapis.com/v1/namespaces/${var.project_id}/jobs/${google_cloud_run_v2_job.financial_refresh.name}:run"
+    headers = {
+      "Content-Type" = "application/json"
+    }
+    body = base64encode(jsonencode({
+      overrides = {
+        containerOverrides = [{
+          env = [{ name = "REFRESH_MODE", value = "intraday" }]
+        }]
+      }
+    }))
+
+    oauth_token {
+      service_account_email = google_service_account.job_sa.email
+    }
+  }
+}
+
 # BOOTSTRAP: Ensure image exists before creating the Cloud Run Job
 resource "null_resource" "bootstrap_image" {
   triggers = {
@@ -62,6 +62,13 @@ resource "google_project_iam_member" "run_invoker" {
   member  = "serviceAccount:${google_service_account.job_sa.email}"
 }
 
+# The intraday scheduler runs the job with an environment override
+resource "google_project_iam_member" "run_executor_with_overrides" {
+  project = var.project_id
+  role    = "roles/run.jobsExecutorWithOverrides"
+  member  = "serviceAccount:${google_service_account.job_sa.email}"
+}
+
 # Evidence Access Service Account Permissions
 resource "google_project_iam_member" "evidence_access_bq_viewer" {
   project = var.project_id
@@ -1,8 +1,15 @@
 import pytest
 from unittest.mock import MagicMock, patch
 import datetime
-from src.bigquery_client import BigQueryClient
+from src.bigquery_client import (
+    BigQueryClient,
+    BigQueryJobError,
+    JobHandle,
+    JobStateUnknownError,
+)
+from src.storage_writer import FakeStorageWriter
 from google.cloud import bigquery
+from google.api_core import exceptions
 
 
 @pytest.fixture
@@ -157,3 +164,315 @@ def test_write_runway_success(client, mock_bq_client):
 
     # 2. Verify Load
     mock_instance.load_table_from_json.assert_called()
+
+
+def test_write_snapshot_submits_jobs_before_waiting(client, mock_bq_client):
+    """Test that each phase's jobs are all submitted before any is awaited."""
+    # Arrange
+    mock_instance = mock_bq_client.return_value
+    events = []
+
+    def make_job(name):
+        job = MagicMock()
+        job.done.return_value = True
+        job.result.side_effect = lambda: events.append(f"wait {name}")
+        return job
+
+    def submit_query(query, job_config):
+        kind = "merge" if "MERGE" in query else "delete"
+        events.append(f"submit {kind}")
+        return make_job(kind)
+
+    mock_instance.query.side_effect = submit_query
+    mock_instance.load_table_from_json.side_effect = lambda data, table_id, job_config: (
+        events.append("submit load") or make_job("load")
+    )
+    accounts = [{"title": "Checking", "balance": 1000, "snapshot_date": "2023-10-27"}]
+    spending = {"snapshot_date": "2023-10-27", "manual_estimates": {}}
+    runway = {"snapshot_date": "2023-10-27", "runway_days": 365}
+
+    # Act
+    client.write_snapshot(accounts, spending, runway)
+
+    # Assert
+    assert (
+        events
+        == ["submit delete"] * 3
+        + ["wait delete"] * 3
+        + ["submit load"] * 3
+        + ["wait load"] * 3
+        + ["submit merge"] * 2
+        + ["wait merge"] * 2
+    )
+
+
+def test_write_snapshot_surfaces_per_job_errors(client, mock_bq_client):
+    """Test that every failed load is reported, not just the first."""
+    # Arrange
+    mock_instance = mock_bq_client.return_value
+    failed_job = MagicMock()
+    failed_job.done.return_value = True
+    failed_job.result.side_effect = exceptions.BadRequest("Invalid schema")
+    mock_instance.load_table_from_json.return_value = failed_job
+    spending = {"snapshot_date": "2023-10-27"}
+    runway = {"snapshot_date": "2023-10-27", "runway_days": 365}
+
+    # Act & Assert
+    with pytest.raises(BigQueryJobError) as exc_info:
+        client.write_snapshot([], spending, runway)
+
+    assert set(exc_info.value.errors) == {
+        "load finance-dashboard-481505.financial_data.mandatory_spending",
+        "load finance-dashboard-481505.financial_data.runway_info",
+    }
+
+
+def test_wait_for_jobs_ignores_missing_table_on_delete(client, mock_bq_client):
+    """Test that a DELETE against a missing table does not fail the write."""
+    # Arrange
+    mock_instance = mock_bq_client.return_value
+    missing_job = MagicMock()
+    missing_job.done.return_value = True
+    missing_job.result.side_effect = exceptions.NotFound("No table")
+    mock_instance.query.return_value = missing_job
+
+    # Act
+    client.write_runway({"snapshot_date": "2023-10-27", "runway_days": 365})
+
+    # Assert
+    mock_instance.load_table_from_json.assert_called_once()
+
+
+def test_wait_for_jobs_deadline(client, mock_bq_client):
+    """Test that jobs still running past the deadline are reported as timeouts."""
+    # Arrange
+    client.job_timeout = 0
+    client.cancel_grace = 0
+    stuck_job = MagicMock()
+    stuck_job.done.return_value = False
+
+    # Act & Assert
+    with pytest.raises(BigQueryJobError) as exc_info:
+        client._wait_for_jobs([JobHandle("load t", "t", stuck_job)])
+
+    assert isinstance(exc_info.value.errors["load t"], TimeoutError)
+    stuck_job.cancel.assert_called_once()
+
+
+def test_refresh_rollups_merges_only_the_new_day(client, mock_bq_client):
+    """Test that rollups are maintained by MERGE scoped to the snapshot date."""
+    # Arrange
+    mock_instance = mock_bq_client.return_value
+
+    # Act
+    client.refresh_rollups("2023-10-27")
+
+    # Assert
+    assert mock_instance.query.call_count == 2
+    queries = [c.args[0] for c in mock_instance.query.call_args_list]
+    assert (
+        "MERGE `finance-dashboard-481505.financial_data.net_worth_by_type_daily`"
+        in queries[0]
+    )
+    assert (
+        "MERGE `finance-dashboard-481505.financial_data.runway_trend_daily`"
+        in queries[1]
+    )
+    for call in mock_instance.query.call_args_list:
+        assert "WHERE snapshot_date BETWEEN @start_date AND @end_date" in call.args[0]
+        params = {p.name: p.value for p in call.kwargs["job_config"].query_parameters}
+        assert params["start_date"] in ("2023-10-27", datetime.date(2023, 10, 27))
+        assert params["end_date"] == params["start_date"]
+
+
+def test_write_snapshot_skips_rollups_without_accounts(client, mock_bq_client):
+    """Test that rollups are not refreshed when no account rows were written."""
+    # Arrange
+    mock_instance = mock_bq_client.return_value
+
+    # Act
+    client.write_snapshot([], {"snapshot_date": "2023-10-27"}, None)
+
+    # Assert
+    queries = [c.args[0] for c in mock_instance.query.call_args_list]
+    assert not any("MERGE" in q for q in queries)
+
+
+def test_write_intraday_balances_appends_timestamped_rows(mock_bq_client):
+    """Test that intraday writes go through the Storage Write API, not load jobs."""
+    # Arrange
+    fake_writer = FakeStorageWriter()
+    client = BigQueryClient(storage_writer=fake_writer)
+    mock_instance = mock_bq_client.return_value
+    snapshot_ts = datetime.datetime(2023, 10, 27, 14, 0, tzinfo=datetime.timezone.utc)
+    data = [
+        {"title": "Checking", "balance": 1000, "type": "Cash"},
+        {"title": "Checking", "balance": 1000, "type": "Cash"},  # Duplicate
+    ]
+
+    # Act
+    client.write_intraday_balances(data, snapshot_ts=snapshot_ts)
+
+    # Assert
+    rows = fake_writer.tables[
+        "finance-dashboard-481505.financial_data.accounts_intraday"
+    ]
+    assert rows == [
+        {
+            "title": "Checking",
+            "balance": 1000,
+            "type": "Cash",
+            "snapshot_ts": "2023-10-27T14:00:00+00:00",
+        }
+    ]
+    assert fake_writer.streams[0]["type"] == "PENDING"
+    assert not mock_instance.query.called
+    assert not mock_instance.load_table_from_json.called
+
+
+def test_write_snapshot_reloads_tables_after_another_delete_fails(
+    client, mock_bq_client
+):
+    """Test that one failed DELETE doesn't leave the other tables emptied."""
+    # Arrange
+    mock_instance = mock_bq_client.return_value
+
+    def submit_query(query, job_config):
+        job = MagicMock()
+        job.done.return_value = True
+        if "DELETE FROM" in query and "mandatory_spending" in query:
+            job.result.side_effect = exceptions.BadRequest("Delete failed")
+        return job
+
+    mock_instance.query.side_effect = submit_query
+    accounts = [{"title": "Checking", "balance": 1000, "snapshot_date": "2023-10-27"}]
+    spending = {"snapshot_date": "2023-10-27"}
+    runway = {"snapshot_date": "2023-10-27", "runway_days": 365}
+
+    # Act & Assert
+    with pytest.raises(BigQueryJobError) as exc_info:
+        client.write_snapshot(accounts, spending, runway)
+
+    assert list(exc_info.value.errors) == [
+        "delete finance-dashboard-481505.financial_data.mandatory_spending"
+    ]
+    loaded_tables = [
+        c.args[1] for c in mock_instance.load_table_from_json.call_args_list
+    ]
+    assert loaded_tables == [
+        "finance-dashboard-481505.financial_data.accounts_raw",
+        "finance-dashboard-481505.financial_data.runway_info",
+    ]
+
+
+def test_pagination_state_round_trip(client, mock_bq_client):
+    """Test that pagination state is read from and upserted into BigQuery."""
+    # Arrange
+    mock_instance = mock_bq_client.return_value
+    mock_instance.query.return_value.result.return_value = [
+        {"per_page": 500, "concurrency": 2}
+    ]
+
+    # Act
+    state = client.load_pagination_state("pocketsmith_transactions")
+    client.save_pagination_state(
+        "pocketsmith_transactions", {"per_page": 750, "concurrency": 3}
+    )
+
+    # Assert
+    assert state == {"per_page": 500, "concurrency": 2}
+    (merge_query,) = mock_instance.query.call_args.args
+    assert (
+        "MERGE `finance-dashboard-481505.financial_data.pagination_state`"
+        in merge_query
+    )
+    params = {
+        p.name: p.value
+        for p in mock_instance.query.call_args.kwargs["job_config"].query_parameters
+    }
+    assert params == {
+        "state_key": "pocketsmith_transactions",
+        "per_page": 750,
+        "concurrency": 3,
+    }
+
+
+def test_load_pagination_state_when_empty(client, mock_bq_client):
+    """Test that a first run with no saved state returns None."""
+    # Arrange
+    mock_instance = mock_bq_client.return_value
+    mock_instance.query.return_value.result.return_value = []
+
+    # Act
+    state = client.load_pagination_state("pocketsmith_transactions")
+
+    # Assert
+    assert state is None
+
+
+def _delete_stuck_for(table_name, settles_as=None):
+    """Builds a query side effect whose DELETE on table_name overruns."""
+
+    def submit_query(query, job_config):
+        job = MagicMock()
+        job.done.return_value = True
+        if "DELETE FROM" in query and table_name in query:
+            if settles_as is None:
+                job.done.return_value = False
+            else:
+                job.done.side_effect = [False, True]
+                job.result.side_effect = settles_as
+        return job
+
+    return submit_query
+
+
+def test_write_snapshot_unsettled_delete_is_cancelled_and_flagged(
+    client, mock_bq_client, caplog
+):
+    """Test that a DELETE that never finishes is cancelled and reported."""
+    # Arrange
+    client.job_timeout = 0
+    client.cancel_grace = 0
+    mock_instance = mock_bq_client.return_value
+    mock_instance.query.side_effect = _delete_stuck_for("runway_info")
+    accounts = [{"title": "Checking", "balance": 1000, "snapshot_date": "2023-10-27"}]
+    runway = {"snapshot_date": "2023-10-27", "runway_days": 365}
+
+    # Act & Assert
+    with pytest.raises(BigQueryJobError) as exc_info:
+        client.write_snapshot(accounts, {}, runway)
+
+    runway_table = "finance-dashboard-481505.financial_data.runway_info"
+    assert isinstance(
+        exc_info.value.errors[f"delete {runway_table}"], JobStateUnknownError
+    )
+    loaded_tables = [
+        c.args[1] for c in mock_instance.load_table_from_json.call_args_list
+    ]
+    assert loaded_tables == ["finance-dashboard-481505.financial_data.accounts_raw"]
+    assert f"DELETE on {runway_table} did not settle" in caplog.text
+
+
+def test_write_snapshot_delete_cancelled_at_deadline_skips_load(
+    client, mock_bq_client, caplog
+):
+    """Test that a DELETE confirmed cancelled leaves its table untouched."""
+    # Arrange
+    client.job_timeout = 0
+    client.cancel_grace = 0
+    mock_instance = mock_bq_client.return_value
+    mock_instance.query.side_effect = _delete_stuck_for(
+        "runway_info", settles_as=exceptions.BadRequest("Job cancelled")
+    )
+    runway = {"snapshot_date": "2023-10-27", "runway_days": 365}
+
+    # Act & Assert
+    with pytest.raises(BigQueryJobError) as exc_info:
+        client.write_runway(runway)
+
+    (error,) = exc_info.value.errors.values()
+    assert isinstance(error, TimeoutError)
+    assert not isinstance(error, JobStateUnknownError)
+    assert not mock_instance.load_table_from_json.called
+    assert "did not settle" not in caplog.text
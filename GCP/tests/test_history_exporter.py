@@ -0,0 +1,157 @@
+import datetime
+from unittest.mock import MagicMock
+import pytest
+import pyarrow as pa
+import pyarrow.parquet as pq
+from src.history_exporter import HistoryExporter
+
+TABLE_ID = "finance-dashboard-481505.financial_data.accounts_raw"
+
+
+def make_batch(dates, balances):
+    return pa.RecordBatch.from_pydict(
+        {
+            "title": ["Checking"] * len(dates),
+            "balance": balances,
+            "snapshot_date": [datetime.date.fromisoformat(d) for d in dates],
+        }
+    )
+
+
+def make_read_client(streams):
+    """Builds a read client whose session serves one list of batches per stream."""
+    read_client = MagicMock()
+    session = MagicMock()
+    session.streams = []
+    for i in range(len(streams)):
+        stream = MagicMock()
+        stream.name = f"stream-{i}"
+        session.streams.append(stream)
+    read_client.create_read_session.return_value = session
+
+    by_name = {f"stream-{i}": batches for i, batches in enumerate(streams)}
+
+    def read_rows(name):
+        pages = []
+        for batch in by_name[name]:
+            page = MagicMock()
+            page.to_arrow.return_value = batch
+            pages.append(page)
+        reader = MagicMock()
+        reader.rows.return_value.pages = pages
+        return reader
+
+    read_client.read_rows.side_effect = read_rows
+    return read_client
+
+
+def test_export_table_writes_partitioned_parquet(tmp_path):
+    """Test that parallel streams are written as date-partitioned Parquet."""
+    # Arrange
+    read_client = make_read_client(
+        [
+            [make_batch(["2023-10-26"], [100.0])],
+            [make_batch(["2023-10-27", "2023-10-27"], [200.0, 300.0])],
+        ]
+    )
+    exporter = HistoryExporter(str(tmp_path), read_client=read_client)
+
+    # Act
+    count = exporter.export_table("accounts_raw", TABLE_ID)
+
+    # Assert
+    assert count == 3
+    table_dir = tmp_path / "accounts_raw"
+    assert sorted(p.name for p in table_dir.iterdir()) == [
+        "snapshot_date=2023-10-26",
+        "snapshot_date=2023-10-27",
+    ]
+    assert pq.read_table(table_dir).num_rows == 3
+
+    _, kwargs = read_client.create_read_session.call_args
+    assert kwargs["parent"] == "projects/finance-dashboard-481505"
+    assert kwargs["read_session"].table == (
+        "projects/finance-dashboard-481505/datasets/financial_data/tables/accounts_raw"
+    )
+    assert kwargs["read_session"].read_options.row_restriction == ""
+
+
+def test_export_table_is_incremental(tmp_path):
+    """Test that later runs only read from the newest exported date onward."""
+    # Arrange
+    first_client = make_read_client(
+        [[make_batch(["2023-10-26", "2023-10-27"], [100.0, 200.0])]]
+    )
+    HistoryExporter(str(tmp_path), read_client=first_client).export_table(
+        "accounts_raw", TABLE_ID
+    )
+    second_client = make_read_client(
+        [[make_batch(["2023-10-27", "2023-10-28"], [250.0, 300.0])]]
+    )
+
+    # Act
+    count = HistoryExporter(str(tmp_path), read_client=second_client).export_table(
+        "accounts_raw", TABLE_ID
+    )
+
+    # Assert
+    assert count == 2
+    _, kwargs = second_client.create_read_session.call_args
+    assert (
+        kwargs["read_session"].read_options.row_restriction
+        == "snapshot_date >= DATE '2023-10-27'"
+    )
+    balances = sorted(pq.read_table(tmp_path / "accounts_raw")["balance"].to_pylist())
+    assert balances == [100.0, 250.0, 300.0]  # Stale 2023-10-27 row replaced
+
+
+def test_export_table_without_new_rows(tmp_path):
+    """Test that an empty read session writes nothing."""
+    # Arrange
+    read_client = make_read_client([])
+    exporter = HistoryExporter(str(tmp_path), read_client=read_client)
+
+    # Act
+    count = exporter.export_table("accounts_raw", TABLE_ID)
+
+    # Assert
+    assert count == 0
+    assert not (tmp_path / "accounts_raw").exists()
+
+
+def test_failed_stream_leaves_existing_export_untouched(tmp_path):
+    """Test that a stream failure publishes nothing and keeps the newest date."""
+    # Arrange
+    first_client = make_read_client(
+        [[make_batch(["2023-10-26", "2023-10-27"], [100.0, 200.0])]]
+    )
+    HistoryExporter(str(tmp_path), read_client=first_client).export_table(
+        "accounts_raw", TABLE_ID
+    )
+    failing_client = make_read_client(
+        [
+            [make_batch(["2023-10-28"], [300.0])],
+            [make_batch(["2023-10-29"], [400.0])],
+        ]
+    )
+    read_rows = failing_client.read_rows.side_effect
+
+    def fail_second_stream(name):
+        if name == "stream-1":
+            raise RuntimeError("Stream reset")
+        return read_rows(name)
+
+    failing_client.read_rows.side_effect = fail_second_stream
+
+    # Act & Assert
+    with pytest.raises(RuntimeError, match="Stream reset"):
+        HistoryExporter(str(tmp_path), read_client=failing_client).export_table(
+            "accounts_raw", TABLE_ID
+        )
+
+    table_dir = tmp_path / "accounts_raw"
+    assert sorted(p.name for p in table_dir.iterdir()) == [
+        "snapshot_date=2023-10-26",
+        "snapshot_date=2023-10-27",
+    ]
+    assert sorted(pq.read_table(table_dir)["balance"].to_pylist()) == [100.0, 200.0]
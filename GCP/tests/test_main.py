@@ -40,9 +40,11 @@ def test_main_flow(
     mock_processor.calculate_mandatory_spending.assert_called_once()
     mock_processor.calculate_runway.assert_called_once()
 
-    assert mock_bq_client.write_accounts.called
-    assert mock_bq_client.write_spending.called
-    assert mock_bq_client.write_runway.called
+    mock_bq_client.write_snapshot.assert_called_once_with(
+        [{"type": "Cash", "balance": 100}],
+        {"grand_total_annual": 100},
+        {"runway_days": 365},
+    )
 
 
 def test_main_missing_env(caplog):
@@ -56,3 +58,35 @@ def test_main_missing_env(caplog):
 
     # Assert
     assert "Missing required environment variables" in caplog.text
+
+
+@patch("src.main.PocketSmithClient")
+@patch("src.main.BigQueryClient")
+@patch("src.main.DataProcessor")
+def test_main_intraday_flow(
+    mock_processor_cls, mock_bq_client_cls, mock_ps_client_cls, mock_config_json
+):
+    """Test that intraday mode appends balances and skips the daily writes."""
+    # Arrange
+    os.environ["POCKETSMITH_API_KEY"] = "test_key"
+    os.environ["POCKETSMITH_USER_ID"] = "123"
+    os.environ["CONFIG_JSON"] = mock_config_json
+    os.environ["REFRESH_MODE"] = "intraday"
+
+    mock_ps_client = mock_ps_client_cls.return_value
+    mock_bq_client = mock_bq_client_cls.return_value
+    mock_processor = mock_processor_cls.return_value
+    mock_processor.categorize_accounts.return_value = [{"type": "Cash", "balance": 100}]
+
+    # Act
+    try:
+        main()
+    finally:
+        del os.environ["REFRESH_MODE"]
+
+    # Assert
+    mock_bq_client.write_intraday_balances.assert_called_once_with(
+        [{"type": "Cash", "balance": 100}]
+    )
+    mock_ps_client.get_transactions_past_year.assert_not_called()
+    mock_bq_client.write_snapshot.assert_not_called()
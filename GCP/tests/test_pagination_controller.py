@@ -0,0 +1,193 @@
+import json
+import time
+from unittest.mock import patch
+from unittest.mock import MagicMock
+from src.pagination_controller import (
+    FileStateStore,
+    PaginationController,
+    STATE_KEY,
+    MAX_CONCURRENCY,
+    MAX_PER_PAGE,
+    MIN_PER_PAGE,
+)
+
+
+def test_defaults_without_state():
+    """Test that a first run starts at the largest page size, sequentially."""
+    # Arrange & Act
+    controller = PaginationController()
+
+    # Assert
+    assert controller.per_page == MAX_PER_PAGE
+    assert controller.concurrency == 1
+
+
+def test_fast_pages_raise_concurrency():
+    """Test that quick responses with quota headroom allow more parallel pages."""
+    # Arrange
+    controller = PaginationController()
+
+    # Act
+    for _ in range(10):
+        controller.observe(0.2, 1000, 10, {"X-RateLimit-Remaining": "500"})
+
+    # Assert
+    assert controller.concurrency == MAX_CONCURRENCY
+
+
+def test_slow_pages_lower_concurrency_and_page_size():
+    """Test that slow responses reduce concurrency now and page size next run."""
+    # Arrange
+    controller = PaginationController()
+    controller.concurrency = 3
+
+    # Act
+    controller.observe(8.0, 1000, 10, {})
+    controller.finish()
+
+    # Assert
+    assert controller.concurrency == 2
+    assert controller.per_page == 250
+
+
+def test_large_payloads_cap_page_size():
+    """Test that the next page size keeps payloads near the byte target."""
+    # Arrange
+    controller = PaginationController()
+
+    # Act
+    controller.observe(1.5, 10 * 1024 * 1024, 1000, {})
+    controller.finish()
+
+    # Assert
+    assert controller.per_page == 200
+
+
+def test_low_remaining_quota_pauses_until_reset():
+    """Test that the controller backs off before the rate limit is reached."""
+    # Arrange
+    controller = PaginationController()
+    controller.concurrency = 3
+    headers = {"X-RateLimit-Remaining": "2", "X-RateLimit-Reset": "30"}
+
+    # Act
+    with patch("time.sleep") as mock_sleep:
+        controller.observe(0.2, 1000, 10, headers)
+
+    # Assert
+    mock_sleep.assert_called_once_with(30.0)
+    assert controller.concurrency == 1
+
+
+def test_past_epoch_reset_does_not_pause():
+    """Test that a reset time already in the past causes no pause."""
+    # Arrange
+    controller = PaginationController()
+    headers = {
+        "X-RateLimit-Remaining": "1",
+        "X-RateLimit-Reset": str(time.time() - 1),
+    }
+
+    # Act
+    with patch("time.sleep") as mock_sleep:
+        controller.observe(0.2, 1000, 10, headers)
+
+    # Assert
+    mock_sleep.assert_not_called()
+    assert controller._throttle_delay(headers) == 0.0
+
+
+def test_future_epoch_reset_pauses_until_then():
+    """Test that an epoch reset time is converted to seconds from now."""
+    # Arrange
+    controller = PaginationController()
+    headers = {
+        "X-RateLimit-Remaining": "1",
+        "X-RateLimit-Reset": str(time.time() + 20),
+    }
+
+    # Act
+    delay = controller._throttle_delay(headers)
+
+    # Assert
+    assert 19.0 < delay <= 20.0
+
+
+def test_state_round_trip(tmp_path):
+    """Test that chosen settings are saved and reloaded by the next run."""
+    # Arrange
+    state_path = str(tmp_path / "pagination.json")
+    controller = PaginationController(FileStateStore(state_path))
+    controller.observe(0.5, 1000, 10, {})
+
+    # Act
+    controller.finish()
+    reloaded = PaginationController(FileStateStore(state_path))
+    reloaded.load()
+
+    # Assert
+    assert reloaded.per_page == controller.per_page
+    assert reloaded.concurrency == controller.concurrency
+
+
+def test_invalid_state_is_ignored(tmp_path):
+    """Test that a corrupt state file falls back to defaults."""
+    # Arrange
+    state_path = tmp_path / "pagination.json"
+    state_path.write_text("not json")
+    controller = PaginationController(FileStateStore(str(state_path)))
+
+    # Act
+    controller.load()
+
+    # Assert
+    assert controller.per_page == MAX_PER_PAGE
+
+
+def test_stored_page_size_is_clamped(tmp_path):
+    """Test that out-of-range stored values are clamped to API limits."""
+    # Arrange
+    state_path = tmp_path / "pagination.json"
+    state_path.write_text(json.dumps({STATE_KEY: {"per_page": 1, "concurrency": 99}}))
+    controller = PaginationController(FileStateStore(str(state_path)))
+
+    # Act
+    controller.load()
+
+    # Assert
+    assert controller.per_page == MIN_PER_PAGE
+    assert controller.concurrency == MAX_CONCURRENCY
+
+
+def test_state_store_round_trip():
+    """Test that settings go through the store used in production."""
+    # Arrange
+    store = MagicMock()
+    store.load_pagination_state.return_value = {"per_page": 400, "concurrency": 3}
+    controller = PaginationController(state_store=store)
+
+    # Act
+    controller.load()
+    controller.finish()
+
+    # Assert
+    store.load_pagination_state.assert_called_once_with(STATE_KEY)
+    store.save_pagination_state.assert_called_once_with(
+        STATE_KEY, {"per_page": 400, "concurrency": 3}
+    )
+
+
+def test_state_store_errors_fall_back_to_defaults():
+    """Test that an unavailable store never fails the refresh."""
+    # Arrange
+    store = MagicMock()
+    store.load_pagination_state.side_effect = Exception("BigQuery Error")
+    store.save_pagination_state.side_effect = Exception("BigQuery Error")
+    controller = PaginationController(state_store=store)
+
+    # Act
+    controller.load()
+    controller.finish()
+
+    # Assert
+    assert controller.per_page == MAX_PER_PAGE
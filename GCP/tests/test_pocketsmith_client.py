@@ -1,3 +1,6 @@
+import json
+from unittest.mock import patch
+from src.pagination_controller import FileStateStore, PaginationController, STATE_KEY
 from src.pocketsmith_client import PocketSmithClient
 
 
@@ -37,3 +40,67 @@ def test_get_transactions_past_year_paginated(requests_mock):
     assert transactions[0]["id"] == 101
     assert transactions[1]["id"] == 102
     assert requests_mock.call_count == 3
+
+
+def test_get_transactions_uses_stored_page_size(requests_mock, tmp_path):
+    """Test that a run starts from the page size recorded by the previous run."""
+    # Arrange
+    state_path = tmp_path / "pagination.json"
+    state_path.write_text(json.dumps({STATE_KEY: {"per_page": 250, "concurrency": 2}}))
+    client = PocketSmithClient(
+        api_key="test_key",
+        user_id="123",
+        pagination=PaginationController(FileStateStore(str(state_path))),
+    )
+    url = "https://api.pocketsmith.com/v2/users/123/transactions"
+    requests_mock.get(url, [{"json": [{"id": 1}]}, {"json": []}])
+
+    # Act
+    client.get_transactions_past_year()
+
+    # Assert
+    assert requests_mock.request_history[0].qs["per_page"] == ["250"]
+    assert json.loads(state_path.read_text())[STATE_KEY]["per_page"] >= 250
+
+
+def test_get_transactions_stops_at_total_header(requests_mock):
+    """Test that known page counts avoid fetching past the last page."""
+    # Arrange
+    client = PocketSmithClient(api_key="test_key", user_id="123")
+    url = "https://api.pocketsmith.com/v2/users/123/transactions"
+    requests_mock.get(
+        url,
+        json=[{"id": 1}],
+        headers={"Total": "3000", "Per-Page": "1000"},
+    )
+
+    # Act
+    transactions = client.get_transactions_past_year()
+
+    # Assert
+    assert len(transactions) == 3
+    assert requests_mock.call_count == 3
+
+
+def test_get_transactions_retries_after_rate_limit(requests_mock):
+    """Test that a 429 response is retried after honouring Retry-After."""
+    # Arrange
+    client = PocketSmithClient(api_key="test_key", user_id="123")
+    url = "https://api.pocketsmith.com/v2/users/123/transactions"
+    requests_mock.get(
+        url,
+        [
+            {"status_code": 429, "headers": {"Retry-After": "2"}},
+            {"json": [{"id": 1}]},
+            {"json": []},
+        ],
+    )
+
+    # Act
+    with patch("time.sleep") as mock_sleep:
+        transactions = client.get_transactions_past_year()
+
+    # Assert
+    assert transactions == [{"id": 1}]
+    mock_sleep.assert_called_once_with(2.0)
+    assert client.pagination.concurrency == 1
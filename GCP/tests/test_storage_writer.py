@@ -0,0 +1,200 @@
+import datetime
+import pytest
+from unittest.mock import MagicMock, patch
+from google.cloud.bigquery_storage_v1 import types
+from src.storage_writer import (
+    APPEND_BATCH_SIZE,
+    BigQueryStorageWriter,
+    FakeStorageWriter,
+    StorageWriteError,
+    _build_row_class,
+    _to_proto,
+)
+
+SCHEMA = [
+    ("title", "STRING"),
+    ("balance", "FLOAT"),
+    ("snapshot_date", "DATE"),
+    ("snapshot_ts", "TIMESTAMP"),
+]
+
+
+def test_proto_rows_encode_bigquery_types():
+    """Test that DATE and TIMESTAMP values use the Storage Write API encodings."""
+    # Arrange
+    row_class, descriptor = _build_row_class("accounts_intraday", SCHEMA)
+    row = {
+        "title": "Checking",
+        "balance": 1000.5,
+        "snapshot_date": "1970-01-11",
+        "snapshot_ts": "1970-01-01T00:00:01+00:00",
+    }
+
+    # Act
+    message = _to_proto(row_class, SCHEMA, row)
+
+    # Assert
+    assert descriptor.name == "AccountsIntraday"
+    assert message.title == "Checking"
+    assert message.balance == 1000.5
+    assert message.snapshot_date == 10
+    assert message.snapshot_ts == 1_000_000
+
+
+def test_proto_rows_leave_missing_values_null():
+    """Test that absent columns are left unset rather than defaulted."""
+    # Arrange
+    row_class, _ = _build_row_class("accounts_intraday", SCHEMA)
+
+    # Act
+    message = _to_proto(row_class, SCHEMA, {"title": "Checking", "balance": None})
+
+    # Assert
+    assert message.HasField("title")
+    assert not message.HasField("balance")
+
+
+def test_fake_pending_stream_is_atomic():
+    """Test that a failed pending write commits none of its rows."""
+    # Arrange
+    fake = FakeStorageWriter()
+    fake.fail_next_append = True
+    rows = [{"title": "Checking"}, {"title": "Savings"}]
+
+    # Act & Assert
+    with pytest.raises(StorageWriteError):
+        fake.append_rows("p.d.t", SCHEMA, rows, pending=True)
+
+    assert fake.tables["p.d.t"] == []
+
+
+def test_fake_committed_stream_appends_rows():
+    """Test that committed streams make rows visible and keep prior appends."""
+    # Arrange
+    fake = FakeStorageWriter()
+    first = [{"title": "Checking", "snapshot_ts": datetime.datetime(2023, 10, 27)}]
+    second = [{"title": "Checking", "snapshot_ts": datetime.datetime(2023, 10, 28)}]
+
+    # Act
+    fake.append_rows("p.d.t", SCHEMA, first, pending=False)
+    fake.append_rows("p.d.t", SCHEMA, second, pending=False)
+
+    # Assert
+    assert len(fake.tables["p.d.t"]) == 2
+    assert [s["type"] for s in fake.streams] == ["COMMITTED", "COMMITTED"]
+
+
+def test_fake_rejects_unknown_columns():
+    """Test that rows must match the declared schema."""
+    # Arrange
+    fake = FakeStorageWriter()
+
+    # Act & Assert
+    with pytest.raises(StorageWriteError, match="unexpected"):
+        fake.append_rows("p.d.t", SCHEMA, [{"unexpected": 1}])
+
+
+def test_proto_rows_reject_unknown_columns():
+    """Test that the real encoder rejects unknown columns just like the fake."""
+    # Arrange
+    row_class, _ = _build_row_class("accounts_intraday", SCHEMA)
+
+    # Act & Assert
+    with pytest.raises(StorageWriteError, match="unexpected"):
+        _to_proto(row_class, SCHEMA, {"title": "Checking", "unexpected": 1})
+
+
+@pytest.fixture
+def mock_write_client():
+    with patch("src.storage_writer.bigquery_storage_v1.BigQueryWriteClient") as mock:
+        instance = mock.return_value
+        instance.table_path.return_value = "projects/p/datasets/d/tables/t"
+        instance.create_write_stream.return_value.name = "stream-1"
+        instance.batch_commit_write_streams.return_value.stream_errors = []
+        yield instance
+
+
+@pytest.fixture
+def mock_append_stream():
+    with patch("src.storage_writer.writer.AppendRowsStream") as mock:
+        yield mock.return_value
+
+
+def make_rows(count):
+    return [{"title": f"Account {i}", "balance": float(i)} for i in range(count)]
+
+
+def test_pending_write_finalizes_then_commits(mock_write_client, mock_append_stream):
+    """Test that a PENDING write appends in offset batches, finalizes and commits."""
+    # Arrange
+    storage_writer = BigQueryStorageWriter()
+    rows = make_rows(APPEND_BATCH_SIZE + 1)
+
+    # Act
+    count = storage_writer.append_rows("p.d.t", SCHEMA, rows, pending=True)
+
+    # Assert
+    assert count == len(rows)
+    _, kwargs = mock_write_client.create_write_stream.call_args
+    assert kwargs["write_stream"].type_ == types.WriteStream.Type.PENDING
+
+    requests = [c.args[0] for c in mock_append_stream.send.call_args_list]
+    assert [r.offset for r in requests] == [0, APPEND_BATCH_SIZE]
+    assert [len(r.proto_rows.rows.serialized_rows) for r in requests] == [
+        APPEND_BATCH_SIZE,
+        1,
+    ]
+    mock_append_stream.close.assert_called_once()
+
+    mock_write_client.finalize_write_stream.assert_called_once_with(name="stream-1")
+    (commit_request,) = mock_write_client.batch_commit_write_streams.call_args.args
+    assert commit_request.parent == "projects/p/datasets/d/tables/t"
+    assert list(commit_request.write_streams) == ["stream-1"]
+
+
+def test_committed_write_skips_finalize_and_commit(
+    mock_write_client, mock_append_stream
+):
+    """Test that COMMITTED streams rely on acknowledged appends alone."""
+    # Arrange
+    storage_writer = BigQueryStorageWriter()
+
+    # Act
+    storage_writer.append_rows("p.d.t", SCHEMA, make_rows(2), pending=False)
+
+    # Assert
+    _, kwargs = mock_write_client.create_write_stream.call_args
+    assert kwargs["write_stream"].type_ == types.WriteStream.Type.COMMITTED
+    mock_append_stream.send.assert_called_once()
+    mock_write_client.finalize_write_stream.assert_not_called()
+    mock_write_client.batch_commit_write_streams.assert_not_called()
+
+
+def test_commit_stream_errors_raise(mock_write_client, mock_append_stream):
+    """Test that commit-time stream errors surface as StorageWriteError."""
+    # Arrange
+    storage_writer = BigQueryStorageWriter()
+    stream_error = MagicMock(error_message="Stream already committed")
+    mock_write_client.batch_commit_write_streams.return_value.stream_errors = [
+        stream_error
+    ]
+
+    # Act & Assert
+    with pytest.raises(StorageWriteError, match="Stream already committed"):
+        storage_writer.append_rows("p.d.t", SCHEMA, make_rows(1), pending=True)
+
+
+def test_rejected_append_closes_stream_without_commit(
+    mock_write_client, mock_append_stream
+):
+    """Test that a failed append leaves the pending stream uncommitted."""
+    # Arrange
+    storage_writer = BigQueryStorageWriter()
+    mock_append_stream.send.return_value.result.side_effect = Exception("Rejected")
+
+    # Act & Assert
+    with pytest.raises(Exception, match="Rejected"):
+        storage_writer.append_rows("p.d.t", SCHEMA, make_rows(1), pending=True)
+
+    mock_append_stream.close.assert_called_once()
+    mock_write_client.batch_commit_write_streams.assert_not_called()